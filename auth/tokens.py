@@ -1,24 +1,74 @@
-from datetime import datetime, timedelta
-from threading import Lock
-from azure.identity import AzureCliCredential
+import logging
+import time
+from threading import Lock, Thread
+
+logger = logging.getLogger(__name__)
 
 AZURE_TOKEN_RESOURCE = "https://ossrdbms-aad.database.windows.net"
 
+# Token lifetime we assume after a refresh
+TOKEN_LIFETIME = 55 * 60.0
+# Below this remaining lifetime a background refresh is started
+SOFT_REFRESH_WINDOW = 10 * 60.0
+# Below this remaining lifetime callers block until a fresh token is fetched
+HARD_BLOCK_WINDOW = 30.0
+# Minimum time between background refresh attempts, so a failing credential is not hammered
+REFRESH_RETRY_INTERVAL = 60.0
+
 class AzureTokenCache:
     def __init__(self):
         self._lock = Lock()
-        self._token = None
-        self._expiration = None
-        self._credential = AzureCliCredential()
+        # Immutable (token, monotonic expiration) pair, swapped as a whole so it can be read without the lock
+        self._cached: tuple[str, float] | None = None
+        self._refreshing = False
+        # Monotonic time the last background refresh started
+        self._last_attempt: float | None = None
+        # Created on first use so importing the server does not pull in azure.identity
+        self._credential = None
+
+    def _fetch(self) -> tuple[str, float]:
+        if self._credential is None:
+            from azure.identity import AzureCliCredential
+            self._credential = AzureCliCredential()
+        token_response = self._credential.get_token(AZURE_TOKEN_RESOURCE)
+        return token_response.token, time.monotonic() + TOKEN_LIFETIME
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._cached = self._fetch()
+        except Exception as e:
+            # Keep serving the old token, the next attempt waits for REFRESH_RETRY_INTERVAL and the
+            # blocking path retries when it gets close to expiry
+            logger.warning(f"Background Azure token refresh failed: {e}", exc_info=True)
+        finally:
+            self._refreshing = False
 
     def get_token(self) -> str:
+        cached = self._cached
+        if cached:
+            token, expiration = cached
+            now = time.monotonic()
+            remaining = expiration - now
+            if remaining > SOFT_REFRESH_WINDOW:
+                return token
+            if remaining > HARD_BLOCK_WINDOW:
+                with self._lock:
+                    last_attempt = self._last_attempt
+                    start_refresh = not self._refreshing and (
+                        last_attempt is None or now - last_attempt >= REFRESH_RETRY_INTERVAL)
+                    if start_refresh:
+                        self._refreshing = True
+                        self._last_attempt = now
+                if start_refresh:
+                    Thread(target=self._refresh_in_background, daemon=True).start()
+                return token
+
         with self._lock:
-            now = datetime.utcnow()
-            if not self._token or not self._expiration or (self._expiration - now) < timedelta(minutes=5):
-                token_response = self._credential.get_token(AZURE_TOKEN_RESOURCE)
-                self._token = token_response.token
-                self._expiration = now + timedelta(minutes=55)
-            return self._token
+            # Another caller may have refreshed while we waited for the lock
+            cached = self._cached
+            if not cached or cached[1] - time.monotonic() <= HARD_BLOCK_WINDOW:
+                cached = self._cached = self._fetch()
+            return cached[0]
 
 # Global token cache instance
 token_cache = AzureTokenCache()
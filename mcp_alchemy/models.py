@@ -1,16 +1,46 @@
 from dataclasses import dataclass, field
+import asyncio
+import functools
+import json
 import os
 import logging
+import random
+import re
 import sys
+import time
+from itertools import islice
 from typing import Any
+from weakref import WeakValueDictionary
 from contextlib import asynccontextmanager
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection, create_async_engine
-from sqlalchemy.engine import Result, Engine
-from sqlalchemy import inspect as sqlalchemy_inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection, AsyncResult, create_async_engine
+from sqlalchemy.engine import Result
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
 from auth.tokens import token_cache
 from pydantic import BaseModel, Field, computed_field
 logger = logging.getLogger(__name__)
 
+# Matches DB_<NAME>_URL and captures <NAME>
+_DB_URL_RE = re.compile(r'^DB_(?P<name>.+?)_URL$')
+
+# Rows fetched per batch when only counting the rows past max_rows
+_COUNT_BATCH_SIZE = 1000
+
+# Retry policy for transient connection failures (restarts, failovers, network blips)
+DB_CONNECT_MAX_RETRIES = int(os.environ.get('DB_CONNECT_MAX_RETRIES', 3))
+DB_CONNECT_BASE_DELAY = float(os.environ.get('DB_CONNECT_BASE_DELAY', 0.5))
+DB_CONNECT_MAX_DELAY = float(os.environ.get('DB_CONNECT_MAX_DELAY', 8.0))
+DB_CONNECT_JITTER = float(os.environ.get('DB_CONNECT_JITTER', 0.5))
+DB_CONNECT_DEADLINE = float(os.environ.get('DB_CONNECT_DEADLINE', 10.0))
+
+# Only these dialects understand user-defined session variables (SET @name = ...)
+_SESSION_VAR_DIALECTS = frozenset({'mysql', 'mariadb'})
+_SET_VERSION_SQL = "SET @mcp_alchemy_version = '2025.8.15.91819'"
+# For PostgreSQL, set default transaction read-only, for other databases try to set transaction read-only
+# These run on every read-only checkout, so they go straight to the driver without statement compilation
+_POSTGRESQL_READ_ONLY = ("SET SESSION default_transaction_read_only = on",)
+_DEFAULT_READ_ONLY = ("SET TRANSACTION READ ONLY",)
+
 class QueryResult(BaseModel):
     database_name: str = Field(description="The name of the database the query result is from")
     columns: list[str] = Field(default_factory=list, description="The columns of the query result")
@@ -28,33 +58,52 @@ class QueryResult(BaseModel):
     def from_sqlalchemy_result(cls, database_name: str, result: Result[Any], max_rows: int = None) -> "QueryResult":
         """Create QueryResult directly from SQLAlchemy Result"""
         columns = list(result.keys())
+        if max_rows:
+            # Collect rows up to max_rows and only count the remaining ones
+            rows = list(map(list, islice(result, max_rows)))
+            remaining_count = sum(map(len, result.partitions(_COUNT_BATCH_SIZE)))
+            database_row_count = len(rows) + remaining_count
+            truncated = remaining_count > 0
+        else:
+            rows = list(map(list, result))
+            database_row_count = len(rows)
+            truncated = False
+
+        # The values come straight from the driver, so skip per-cell pydantic validation
+        return cls.model_construct(
+            database_name=database_name,
+            columns=columns,
+            rows=rows,
+            database_row_count=database_row_count,
+            truncated=truncated
+        )
+
+    @classmethod
+    async def from_async_result(cls, database_name: str, result: AsyncResult[Any], max_rows: int = None) -> "QueryResult":
+        """Create QueryResult from a streamed SQLAlchemy AsyncResult, fetching rows in partitions"""
+        columns = list(result.keys())
         rows = []
         database_row_count = 0
 
-        # Collect all rows
-        for row in result:
-            database_row_count += 1
-            rows.append(list(row))
+        # Keep rows up to max_rows and only count the rest as the partitions stream by
+        async for partition in result.partitions():
+            database_row_count += len(partition)
+            if not max_rows:
+                rows.extend(map(list, partition))
+            elif len(rows) < max_rows:
+                rows.extend(map(list, partition[:max_rows - len(rows)]))
 
-        # Create instance
-        instance = cls(
+        return cls.model_construct(
             database_name=database_name,
             columns=columns,
             rows=rows,
             database_row_count=database_row_count,
-            truncated=False
+            truncated=database_row_count > len(rows)
         )
 
-        # Apply truncation if needed
-        if max_rows and database_row_count > max_rows:
-            instance.truncated = True
-            instance.rows = instance.rows[:max_rows]
-
-        return instance
-
-def create_engine_for_config(config: "DatabaseConfig") -> AsyncEngine:
-    """Create async engine with MCP-optimized settings for a specific database config"""
-    import json
+@functools.lru_cache(maxsize=1)
+def _engine_options_template() -> dict[str, Any]:
+    """Engine options parsed once from DB_ENGINE_OPTIONS merged over the MCP-optimized defaults"""
     db_engine_options = os.environ.get('DB_ENGINE_OPTIONS')
     user_options = json.loads(db_engine_options) if db_engine_options else {}
 
@@ -62,21 +111,68 @@ def create_engine_for_config(config: "DatabaseConfig") -> AsyncEngine:
     options = {
         'isolation_level': 'AUTOCOMMIT',
         # Test connections before use (handles MySQL 8hr timeout, network drops)
-        'pool_pre_ping': True,
-        # Keep minimal connections (MCP typically handles one request at a time)
-        'pool_size': 1,
-        # Allow temporary burst capacity for edge cases
-        'max_overflow': 2,
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('true', '1', 'yes', 'on'),
+        # Enough persistent connections that concurrent tool calls don't serialize on one
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        # Allow temporary burst capacity on top of the pool
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
         # Force refresh connections older than 1hr (well under MySQL's 8hr default)
-        'pool_recycle': 3600,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+        # Reuse the most recently returned connection so a small hot set stays warm (server-side caches, TLS
+        # sessions) and surplus connections idle out instead of being cycled round-robin
+        'pool_use_lifo': True,
         # User can override any of the above
         **user_options
     }
+    logger.info(f"Connection pool: pool_size={options.get('pool_size')} max_overflow={options.get('max_overflow')} "
+                f"pool_recycle={options.get('pool_recycle')} pool_pre_ping={options.get('pool_pre_ping')} "
+                f"pool_use_lifo={options.get('pool_use_lifo')}")
+    return options
+
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+def _spawn_background_task(loop: asyncio.AbstractEventLoop, coro) -> None:
+    task = loop.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def _set_version_on_connect(dbapi_connection, connection_record) -> None:
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(_SET_VERSION_SQL)
+        cursor.close()
+    except Exception:
+        # Some databases don't support session variables
+        pass
+
+# Engines shared by configs pointing at the same database, kept alive by the configs using them
+_engine_cache: WeakValueDictionary[tuple[str, bool], AsyncEngine] = WeakValueDictionary()
+
+def _engine_cache_key(config: "DatabaseConfig") -> tuple[str, bool]:
+    # The un-substituted URL keeps token rotation from splitting the cache. Read-only configs get their
+    # own engine because PostgreSQL's read-only SET sticks to the pooled connection.
+    return config.url, config.read_only
 
-    return create_async_engine(config.get_resolved_url(), **options)
-
-
-@dataclass
+def create_engine_for_config(config: "DatabaseConfig") -> AsyncEngine:
+    """Create async engine with MCP-optimized settings for a specific database config"""
+    key = _engine_cache_key(config)
+    engine = _engine_cache.get(key)
+    if engine is None:
+        engine = _engine_cache[key] = create_async_engine(config.get_resolved_url(), **_engine_options_template())
+        # Set version variable once per physical connection for databases that support it
+        if engine.dialect.name in _SESSION_VAR_DIALECTS:
+            event.listen(engine.sync_engine, "connect", _set_version_on_connect)
+    return engine
+
+def _forget_engine(config: "DatabaseConfig", engine: AsyncEngine) -> None:
+    """Stop sharing engine so the next create_engine_for_config builds a fresh one"""
+    key = _engine_cache_key(config)
+    if _engine_cache.get(key) is engine:
+        del _engine_cache[key]
+
+
+@dataclass(slots=True)
 class DatabaseConfig:
     name: str
     url: str
@@ -84,56 +180,122 @@ class DatabaseConfig:
     available: bool = True
     read_only: bool = False
     engine: AsyncEngine | None = None
+    _azure_marker: bool = field(init=False, default=False, repr=False)
+    _resolved_url: str | None = field(init=False, default=None, repr=False)
+    _resolved_for_token: str | None = field(init=False, default=None, repr=False)
+    # Learned retry delay multiplier: grows while connecting fails, shrinks again on success
+    _backoff_mult: float = field(init=False, default=1.0, repr=False)
+    # Event loop the engine was created on, used to dispose it from any context
+    _loop: asyncio.AbstractEventLoop | None = field(init=False, default=None, repr=False)
+    # Dialect facts resolved once after the first successful connect
+    _dialect_name: str | None = field(init=False, default=None, repr=False)
+    _readonly_stmts: tuple[str, ...] = field(init=False, default=(), repr=False)
+
+    def __post_init__(self) -> None:
+        self._azure_marker = 'AZURE_TOKEN' in self.url
 
     def get_resolved_url(self) -> str:
         """Get connection URL with AZURE_TOKEN replaced if present"""
-        if 'AZURE_TOKEN' in self.url:
-            return self.url.replace('AZURE_TOKEN', token_cache.get_token())
-        return self.url
+        if not self._azure_marker:
+            return self.url
+        token = token_cache.get_token()
+        # The token cache hands out the same str object until it rotates
+        if token is not self._resolved_for_token:
+            self._resolved_url = self.url.replace('AZURE_TOKEN', token)
+            self._resolved_for_token = token
+        return self._resolved_url
 
     def get_engine(self) -> AsyncEngine:
         """Get or create the SQLAlchemy engine for this database"""
-        if self.engine is None:
+        # Configs for the same database share one engine; when any of them discards it, it leaves the shared
+        # cache and every other holder picks up the replacement here instead of using the disposed engine
+        if self.engine is None or _engine_cache.get(_engine_cache_key(self)) is not self.engine:
             self.engine = create_engine_for_config(self)
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = None
         return self.engine
 
+    def _discard_engine(self) -> None:
+        """Drop the engine and dispose its pool in the background without waiting for it"""
+        engine, self.engine = self.engine, None
+        if engine is None:
+            return
+        _forget_engine(self, engine)
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            # The dispose() coroutine is created on the loop itself, so it can't be left un-awaited
+            try:
+                loop.call_soon_threadsafe(lambda: _spawn_background_task(loop, engine.dispose()))
+                return
+            except RuntimeError:
+                # The loop was closed in the meantime
+                pass
+        # No running loop to close the connections on, just drop the pool
+        engine.sync_engine.dispose(close=False)
+
+    def pool_capacity(self) -> int:
+        """Number of connections the engine's pool can hand out at the same time"""
+        options = _engine_options_template()
+        # SQLAlchemy's QueuePool defaults apply when the options don't say otherwise
+        return max(1, options.get('pool_size', 5) + options.get('max_overflow', 10))
+
     def mark_unavailable(self) -> None:
         """Mark this database as unavailable"""
         self.available = False
-        if self.engine:
+        self._discard_engine()
+
+    def _reset_for_retry(self, error: DBAPIError) -> None:
+        """Throw away the engine if retrying with it is pointless
+
+        That is when SQLAlchemy invalidated its connections, or when the URL embeds an Azure token
+        that may have rotated. Otherwise the pool is healthy and is kept.
+        """
+        if error.connection_invalidated or self._azure_marker:
+            self._discard_engine()
+
+    async def _connect_with_retry(self) -> AsyncConnection:
+        """Connect, retrying transient failures with exponential backoff and jitter"""
+        attempts = max(1, DB_CONNECT_MAX_RETRIES)
+        deadline = time.monotonic() + DB_CONNECT_DEADLINE
+        for attempt in range(attempts):
             try:
-                import asyncio
-                asyncio.create_task(self.engine.dispose())
-            except Exception:
-                pass
-        self.engine = None
+                conn = await self.get_engine().connect()
+            except (OperationalError, InterfaceError) as e:
+                self._backoff_mult = min(8.0, self._backoff_mult * 1.5)
+                delay = min(DB_CONNECT_MAX_DELAY, DB_CONNECT_BASE_DELAY * 2 ** attempt * self._backoff_mult)
+                delay *= 1 + random.uniform(0, DB_CONNECT_JITTER)
+                if attempt == attempts - 1 or time.monotonic() + delay > deadline:
+                    raise
+                logger.warning(f"Connecting to database '{self.name}' failed, retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                self._reset_for_retry(e)
+            else:
+                self._backoff_mult = max(0.5, self._backoff_mult / 1.25)
+                if attempt:
+                    logger.debug(f"Connected to database '{self.name}' after {attempt + 1} attempts")
+                if self._dialect_name is None:
+                    self._resolve_dialect(conn.dialect.name)
+                return conn
+
+    def _resolve_dialect(self, dialect_name: str) -> None:
+        self._dialect_name = dialect_name
+        self._readonly_stmts = _POSTGRESQL_READ_ONLY if dialect_name == 'postgresql' else _DEFAULT_READ_ONLY
 
     @asynccontextmanager
     async def connection(self):
-        """Get a connection with proper setup (version, read-only enforcement)"""
-        from sqlalchemy import text
-
+        """Get a connection with proper setup (read-only enforcement)"""
         if not self.available:
             raise ValueError(f"Database '{self.name}' is not available")
 
-        engine = self.get_engine()
-        async with engine.connect() as conn:
-            # Set version variable for databases that support it
-            try:
-                _ = await conn.execute(text("SET @mcp_alchemy_version = '2025.8.15.91819'"))
-            except Exception:
-                # Some databases don't support session variables
-                pass
-
+        conn = await self._connect_with_retry()
+        try:
             # Set read-only mode if configured
             if self.read_only:
                 try:
-                    # For PostgreSQL, set default transaction read-only
-                    if 'postgresql' in str(engine.url):
-                        _ = await conn.execute(text("SET SESSION default_transaction_read_only = on"))
-                    else:
-                        # For other databases, try to set transaction read-only
-                        _ = await conn.execute(text("SET TRANSACTION READ ONLY"))
+                    for stmt in self._readonly_stmts:
+                        _ = await conn.exec_driver_sql(stmt)
                 except Exception as e:
                     # If we cannot ensure read-only mode, we cannot use the database and need to violently puke
                     # it is *crucial* to puke otherwise the LLM could easily change shit it shouldn't.
@@ -141,6 +303,8 @@ class DatabaseConfig:
                     sys.exit(1)
 
             yield conn
+        finally:
+            await conn.close()
 
     def to_description_text(self) -> str:
         desc_parts: list[str] = []
@@ -152,7 +316,7 @@ class DatabaseConfig:
         return f"{self.name}{desc}"
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseManager:
     """Manages a collection of database configurations"""
     databases: dict[str, DatabaseConfig] = field(default_factory=dict)
@@ -161,26 +325,27 @@ class DatabaseManager:
     def from_environment(cls) -> "DatabaseManager":
         """Create DatabaseManager by parsing environment variables"""
         manager = cls()
+        # Only DB_* variables are relevant, so look them up in this small dict instead of os.environ
+        db_env = {key: value for key, value in os.environ.items() if key.startswith('DB_')}
 
-        for key, value in os.environ.items():
-            if key.startswith('DB_') and key.endswith('_URL'):
+        for key, value in db_env.items():
+            if m := _DB_URL_RE.match(key):
                 # Extract database name from key (e.g., DB_PRODUCTION_URL -> production)
-                db_name_part = key[3:-4]  # Remove 'DB_' prefix and '_URL' suffix
-                db_name = db_name_part.lower()
+                db_name_part = m.group('name')
+                db_name = sys.intern(db_name_part.lower())
 
                 # Check for duplicate names
                 if db_name in manager.databases:
-                    import sys
                     print(f"Error: Duplicate database name '{db_name}' found in environment variables", file=sys.stderr)
                     sys.exit(1)
 
                 # Get description (optional)
                 desc_key = f'DB_{db_name_part}_DESC'
-                description = os.environ.get(desc_key, '')
+                description = db_env.get(desc_key, '')
 
                 # Get read-only setting (optional)
                 readonly_key = f'DB_{db_name_part}_READ_ONLY'
-                read_only = os.environ.get(readonly_key, '').lower() in ('true', '1', 'yes', 'on')
+                read_only = db_env.get(readonly_key, '').lower() in ('true', '1', 'yes', 'on')
 
                 manager.databases[db_name] = DatabaseConfig(
                     name=db_name,
@@ -191,18 +356,17 @@ class DatabaseManager:
 
         # Backwards compatibility: if no DB_*_URL vars, try DB_URL
         if not manager.databases:
-            if 'DB_URL' in os.environ:
+            if 'DB_URL' in db_env:
                 # Check for read-only setting (optional)
-                read_only = os.environ.get('DB_READ_ONLY', '').lower() in ('true', '1', 'yes', 'on')
+                read_only = db_env.get('DB_READ_ONLY', '').lower() in ('true', '1', 'yes', 'on')
 
                 manager.databases['default'] = DatabaseConfig(
                     name='default',
-                    url=os.environ['DB_URL'],
+                    url=db_env['DB_URL'],
                     description='Default database',
                     read_only=read_only
                 )
             else:
-                import sys
                 print("Error: No database configuration found. Set DB_{NAME}_URL environment variables or DB_URL", file=sys.stderr)
                 sys.exit(1)
 
@@ -210,10 +374,14 @@ class DatabaseManager:
 
     def get_database(self, name: str) -> DatabaseConfig:
         """Get database config by name (case insensitive)"""
-        name = name.lower()
-        if name not in self.databases:
-            raise ValueError(f"Database '{name}' is not configured")
-        return self.databases[name]
+        # Callers usually pass the canonical lowercase name, so try that before lowercasing
+        config = self.databases.get(name)
+        if config is None:
+            name = name.lower()
+            config = self.databases.get(name)
+            if config is None:
+                raise ValueError(f"Database '{name}' is not configured")
+        return config
 
     def connection(self, database: str):
         """Get a connection context manager for the specified database"""
@@ -225,7 +393,7 @@ class DatabaseManager:
 
     def get_available_databases_text(self) -> str:
         """Get formatted text of available databases for tool descriptions"""
-        return "\n".join(self.get_available_databases())
+        return "\n".join([config.name for config in self.databases.values() if config.available])
 
     def get_available_databases_text_with_description(self) -> str:
         """Get formatted text of available databases for tool descriptions with description"""
@@ -1,16 +1,24 @@
 import os
-import json
+import asyncio
+import functools
 import hashlib
+import re
+import tempfile
+import time
 from typing import Annotated, Any
 
 from fastmcp import Context, FastMCP
 from fastmcp.utilities.logging import get_logger
 from mcp.types import ToolAnnotations
 
-from sqlalchemy import text, inspect
-from sqlalchemy.engine import Inspector
+from sqlalchemy import text, inspect, TextClause
+from sqlalchemy.engine import Dialect, Inspector
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.engine.reflection import ObjectKind
+from sqlalchemy.exc import NoSuchTableError
 
 from pydantic import Field
+from pydantic_core import to_json
 
 from mcp_alchemy.models import DatabaseManager, QueryResult
 
@@ -52,6 +60,31 @@ async def validate_or_elicit_database(database: str | None, ctx: Context) -> str
         # Client doesn't support elicitation or other error
         return None
 
+# Catalog information (table names, per-table schema text) keyed by (kind, database, ...)
+_catalog_cache: dict[tuple[str, ...], tuple[float, Any]] = {}
+
+def catalog_cache_get(key: tuple[str, ...]) -> Any | None:
+    """Return the cached value for key if it is younger than CATALOG_CACHE_TTL"""
+    entry = _catalog_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < CATALOG_CACHE_TTL:
+        return entry[1]
+    return None
+
+def catalog_cache_put(key: tuple[str, ...], value: Any) -> None:
+    now = time.monotonic()
+    if len(_catalog_cache) >= CATALOG_CACHE_MAX_ENTRIES:
+        # Drop expired entries first, then the oldest ones if still full
+        for k in [k for k, (ts, _) in _catalog_cache.items() if now - ts >= CATALOG_CACHE_TTL]:
+            del _catalog_cache[k]
+        while len(_catalog_cache) >= CATALOG_CACHE_MAX_ENTRIES:
+            del _catalog_cache[next(iter(_catalog_cache))]
+    _catalog_cache[key] = (now, value)
+
+def catalog_cache_clear(database: str) -> None:
+    """Forget all cached catalog information for database"""
+    for k in [k for k in _catalog_cache if k[1] == database]:
+        del _catalog_cache[k]
+
 
 
 
@@ -59,8 +92,36 @@ async def validate_or_elicit_database(database: str | None, ctx: Context) -> str
 
 VERSION = "2025.8.15.91819"
 AVAILABLE_DATABASES = database_manager.get_available_databases_text()
+AVAILABLE_DATABASES_MESSAGE = f"Available databases:\n{AVAILABLE_DATABASES}"
 EXECUTE_QUERY_MAX_CHARS = int(os.environ.get('EXECUTE_QUERY_MAX_CHARS', 4000))
+EXECUTE_QUERY_YIELD_PER = int(os.environ.get('EXECUTE_QUERY_YIELD_PER', 1000))
+EXECUTE_QUERY_MAX_QUERY_LENGTH = int(os.environ.get('EXECUTE_QUERY_MAX_QUERY_LENGTH', 65536))
+EXECUTE_QUERY_MAX_PARAMS = int(os.environ.get('EXECUTE_QUERY_MAX_PARAMS', 1000))
 CLAUDE_LOCAL_FILES_PATH = os.environ.get('CLAUDE_LOCAL_FILES_PATH')
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', 60))
+CATALOG_CACHE_MAX_ENTRIES = 1024
+# Connections schema_definitions uses at most for dialects that reflect table by table
+SCHEMA_REFLECTION_MAX_WORKERS = 8
+# Queries up to this length are cached as text() clauses, well below EXECUTE_QUERY_MAX_QUERY_LENGTH so the
+# 256 cache entries stay small
+_TEXT_CACHE_MAX_QUERY_CHARS = 8 * 1024
+
+# Column keys rendered separately or not at all, and keys shown without their value
+_SKIP_COLUMN_KEYS = frozenset({"name", "type", "comment"})
+_SHOW_KEY_ONLY = frozenset({"nullable", "autoincrement"})
+
+# Dialects that can only open server-side cursors inside a transaction
+_STREAM_IN_TRANSACTION_DIALECTS = frozenset({"postgresql"})
+
+# Statements that change the catalog and invalidate cached table names and schemas. Leading whitespace and
+# -- or /* */ comments are skipped, the possessive quantifiers keep that from backtracking on long input.
+_DDL_RE = re.compile(r'(?:\s|--[^\n]*+|/\*.*?\*/)*+(CREATE|DROP|ALTER|RENAME)\b', re.IGNORECASE | re.DOTALL)
+
+# Catalog categories reflected per table; the optional ones are skipped where the dialect can't introspect them
+_REFLECT_REQUIRED = ("columns", "pk_constraint", "foreign_keys")
+_REFLECT_OPTIONAL = ("indexes", "unique_constraints", "check_constraints")
+# Dialects whose reflected columns carry a primary_key flag, making a separate primary key lookup redundant
+_COLUMN_PK_DIALECTS = frozenset({"sqlite"})
 
 ### MCP ###
 
@@ -83,22 +144,30 @@ get_logger(__name__).info(f"Starting MCP Alchemy version {VERSION}")
 async def get_table_names(
     ctx: Context,
     database: Annotated[str | None, Field(description="Database to query")],
-    q: Annotated[str | None, Field(default=None, description="Optional substring to search for in table names (if not provided, returns all tables)")]
+    q: Annotated[str | None, Field(default=None, description="Optional substring to search for in table names (if not provided, returns all tables)")],
+    refresh: Annotated[bool, Field(default=False, description="Bypass cached catalog information, e.g. after creating or dropping tables")]
 ) -> str:
     database = await validate_or_elicit_database(database, ctx)
     if database is None:
-        return f"Available databases:\n{AVAILABLE_DATABASES}"
+        return AVAILABLE_DATABASES_MESSAGE
 
-    async with database_manager.connection(database) as conn:
-        def _get_tables(sync_conn):
-            inspector = inspect(sync_conn)
-            table_names = inspector.get_table_names()
-            if q:
-                return [name for name in table_names if q in name]
-            return table_names
+    if refresh:
+        catalog_cache_clear(database)
 
-        table_names = await conn.run_sync(_get_tables)
-        return ", ".join(table_names)
+    cache_key = ("table_names", database)
+    table_names = catalog_cache_get(cache_key)
+    if table_names is None:
+        async with database_manager.connection(database) as conn:
+            table_names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        catalog_cache_put(cache_key, table_names)
+
+    if q:
+        table_names = [name for name in table_names if q in name]
+    return ", ".join(table_names)
+
+def _batches_reflection(dialect: Dialect) -> bool:
+    """Whether the dialect implements get_multi_* natively instead of looping over tables"""
+    return type(dialect).get_multi_columns is not DefaultDialect.get_multi_columns
 
 @mcp.tool(
     description="Returns schema and relation information for the given tables.",
@@ -107,69 +176,78 @@ async def get_table_names(
 async def schema_definitions(
         ctx: Context,
         database: Annotated[str, Field(description="Database to query")],
-        table_names: Annotated[list[str], Field(default_factory=list, description="The names of the tables to get the schema for")]
+        table_names: Annotated[list[str], Field(default_factory=list, description="The names of the tables to get the schema for")],
+        refresh: Annotated[bool, Field(default=False, description="Bypass cached catalog information, e.g. after altering tables")]
     ) -> str:
 
     selected_database = await validate_or_elicit_database(database, ctx)
     if selected_database is None:
-        return f"Available databases:\n{AVAILABLE_DATABASES}"
-
-    def format(inspector: Inspector, table_name: str) -> str:
-        columns = inspector.get_columns(table_name)
-        foreign_keys = inspector.get_foreign_keys(table_name)
-        primary_keys = set(inspector.get_pk_constraint(table_name)["constrained_columns"])
+        return AVAILABLE_DATABASES_MESSAGE
+
+    def reflect(inspector: Inspector, names: list[str]) -> dict[str, dict[str, Any] | None]:
+        # One batched get_multi_* call per catalog category for all names; dialects without a native batch
+        # query fall back to per-table lookups inside SQLAlchemy
+        reflected: dict[str, dict[str, Any] | None] = {}
+        for category in _REFLECT_REQUIRED + _REFLECT_OPTIONAL:
+            if category == "pk_constraint" and inspector.dialect.name in _COLUMN_PK_DIALECTS:
+                reflected[category] = {
+                    name: {"constrained_columns": [column["name"] for column in columns if column.get("primary_key")]}
+                    for name, columns in reflected["columns"].items()}
+                continue
+            try:
+                multi = getattr(inspector, f"get_multi_{category}")(filter_names=names, kind=ObjectKind.ANY)
+            except (NotImplementedError, AttributeError):
+                if category in _REFLECT_REQUIRED:
+                    raise
+                # Some databases don't support index or constraint introspection
+                reflected[category] = None
+                continue
+            reflected[category] = {name: value for (_, name), value in multi.items()}
+        return reflected
+
+    def format(reflected: dict[str, dict[str, Any] | None], table_name: str) -> str:
+        if table_name not in reflected["columns"]:
+            raise NoSuchTableError(table_name)
+        columns = reflected["columns"][table_name]
+        foreign_keys = reflected["foreign_keys"].get(table_name)
+        primary_keys = set(reflected["pk_constraint"].get(table_name, {}).get("constrained_columns") or ())
         result = [f"Table: '{table_name}'"]
 
-        # Process columns
-        show_key_only = {"nullable", "autoincrement"}
+        # Process columns (read only, the inspector's dicts may be shared with its cache)
         for column in columns:
-            if "comment" in column:
-                del column["comment"]
-            name = column.pop("name")
-            column_parts = (["primary key"] if name in primary_keys else []) + [str(
-                column.pop("type"))] + [k if k in show_key_only else f"{k}={v}" for k, v in column.items() if v]
+            name = column["name"]
+            column_parts = (["primary key"] if name in primary_keys else []) + [str(column["type"])] + [
+                k if k in _SHOW_KEY_ONLY else f"{k}={v}" for k, v in column.items() if v and k not in _SKIP_COLUMN_KEYS]
             result.append(f"    {name}: " + ", ".join(column_parts))
 
         # Process indexes
-        try:
-            indexes = inspector.get_indexes(table_name)
-            if indexes:
-                result.extend(["", "    Indexes:"])
-                for index in indexes:
-                    name = index.get("name", "unnamed")
-                    columns = ", ".join(index["column_names"])
-                    unique = "unique" if index.get("unique") else ""
-                    unique_str = f" {unique}" if unique else ""
-                    result.append(f"      {name} on ({columns}){unique_str}")
-        except (NotImplementedError, AttributeError):
-            # Some databases don't support index introspection
-            pass
+        indexes = (reflected["indexes"] or {}).get(table_name)
+        if indexes:
+            result.extend(["", "    Indexes:"])
+            for index in indexes:
+                name = index.get("name", "unnamed")
+                columns = ", ".join(index["column_names"])
+                unique = "unique" if index.get("unique") else ""
+                unique_str = f" {unique}" if unique else ""
+                result.append(f"      {name} on ({columns}){unique_str}")
 
         # Process unique constraints
-        try:
-            unique_constraints = inspector.get_unique_constraints(table_name)
-            if unique_constraints:
-                result.extend(["", "    Unique Constraints:"])
-                for constraint in unique_constraints:
-                    name = constraint.get("name", "unnamed")
-                    columns = ", ".join(constraint["column_names"])
-                    result.append(f"      {name} on ({columns})")
-        except (NotImplementedError, AttributeError):
-            # Some databases don't support unique constraint introspection
-            pass
+        unique_constraints = (reflected["unique_constraints"] or {}).get(table_name)
+        if unique_constraints:
+            result.extend(["", "    Unique Constraints:"])
+            for constraint in unique_constraints:
+                name = constraint.get("name", "unnamed")
+                columns = ", ".join(constraint["column_names"])
+                result.append(f"      {name} on ({columns})")
 
         # Process check constraints
-        try:
-            check_constraints = inspector.get_check_constraints(table_name)
-            if check_constraints:
-                result.extend(["", "    Check Constraints:"])
-                for constraint in check_constraints:
-                    name = constraint.get("name", "unnamed")
-                    sqltext = constraint.get("sqltext", "unknown")
-                    result.append(f"      {name}: {sqltext}")
-        except (NotImplementedError, AttributeError):
-            # Some databases don't support check constraint introspection
-            pass
+        check_constraints = (reflected["check_constraints"] or {}).get(table_name)
+        if check_constraints:
+            result.extend(["", "    Check Constraints:"])
+            for constraint in check_constraints:
+                name = constraint.get("name", "unnamed")
+                sqltext = constraint.get("sqltext", "unknown")
+                result.append(f"      {name}: {sqltext}")
 
         # Process relationships
         if foreign_keys:
@@ -182,30 +260,174 @@ async def schema_definitions(
 
         return "\n".join(result)
 
-    async with database_manager.connection(selected_database) as conn:
-        overall_result = []
-        if database != selected_database:
-            overall_result.append(f"The user selected this database: '{selected_database}'")
+    if refresh:
+        catalog_cache_clear(selected_database)
+
+    overall_result = []
+    if database != selected_database:
+        overall_result.append(f"The user selected this database: '{selected_database}'")
+    else:
+        overall_result.append(f"Database: '{selected_database}'")
+
+    formatted_tables = {}
+    for table_name in table_names:
+        formatted = catalog_cache_get(("schema", selected_database, table_name))
+        if formatted is not None:
+            formatted_tables[table_name] = formatted
+    missing = [table_name for table_name in table_names if table_name not in formatted_tables]
+
+    if missing:
+        config = database_manager.get_database(selected_database)
+        if _batches_reflection(config.get_engine().dialect):
+            # One inspector reflects every table with a single query per catalog category
+            workers = 1
         else:
-            overall_result.append(f"Database: '{selected_database}'")
-        def _get_schema(sync_conn):
-            inspector = inspect(sync_conn)
-            for table_name in table_names:
-                formatted = format(inspector, table_name)
-                overall_result.append(formatted)
-            return "\n".join(overall_result)
+            # Reflection is per table, so spread the tables over a few pooled connections to overlap the
+            # round-trips while leaving the rest of the pool to concurrent queries
+            workers = min(len(missing), SCHEMA_REFLECTION_MAX_WORKERS, config.pool_capacity())
+        chunks = [missing[i::workers] for i in range(workers)]
+
+        async def _get_schema_chunk(chunk: list[str]) -> dict[str, str]:
+            async with database_manager.connection(selected_database) as conn:
+                def _get_schema(sync_conn):
+                    reflected = reflect(inspect(sync_conn), chunk)
+                    return {table_name: format(reflected, table_name) for table_name in chunk}
+
+                return await conn.run_sync(_get_schema)
 
-        return await conn.run_sync(_get_schema)
+        try:
+            # A failing chunk (e.g. an unknown table) cancels its siblings
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(_get_schema_chunk(chunk)) for chunk in chunks]
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+        for task in tasks:
+            for table_name, formatted in task.result().items():
+                catalog_cache_put(("schema", selected_database, table_name), formatted)
+                formatted_tables[table_name] = formatted
+
+    overall_result.extend(formatted_tables[table_name] for table_name in table_names)
+    return "\n".join(overall_result)
+
+@functools.lru_cache(maxsize=256)
+def _cached_text(query: str) -> TextClause:
+    """text() clauses are immutable and re-bindable, so one per distinct query string is enough"""
+    return text(query)
+
+def _compile_text(query: str) -> TextClause:
+    # Very long queries are usually one-off bulk statements, keep them from pinning memory in the cache
+    if len(query) > _TEXT_CACHE_MAX_QUERY_CHARS:
+        return text(query)
+    return _cached_text(query)
+
+def save_query_result(result: QueryResult) -> str | None:
+    """Save complete result set for Claude if configured"""
+    if not CLAUDE_LOCAL_FILES_PATH:
+        return None
 
-def execute_read_query_description():
+    def serialize():
+        """Yield the result's JSON one row at a time, so memory stays bounded by a row rather than the document"""
+        envelope = result.__pydantic_serializer__.to_json(result, exclude={"rows"})
+        yield envelope[:-1] + b',"rows":['
+        for i, row in enumerate(result.rows):
+            if i:
+                yield b","
+            yield to_json(row)
+        yield b"]}"
+
+    # The file name is the content hash, so hash first and skip all disk IO when the file already exists
+    digest = hashlib.sha256()
+    for chunk in serialize():
+        digest.update(chunk)
+    file_name = f"{digest.hexdigest()}.json"
+    file_path = os.path.join(CLAUDE_LOCAL_FILES_PATH, file_name)
+
+    if not os.path.exists(file_path):
+        # Write a hidden temporary file and rename it once complete, so readers never see partial JSON
+        fd, tmp_path = tempfile.mkstemp(dir=CLAUDE_LOCAL_FILES_PATH, prefix=".", suffix=f".tmp.{os.getpid()}")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in serialize():
+                    f.write(chunk)
+            # mkstemp creates the file private to us, the local files server needs to read it
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    return (
+        f"Full result set url: https://cdn.jsdelivr.net/pyodide/claude-local-files/{file_name}"
+        " (format: QueryResult JSON with columns/rows structure)"
+        " (ALWAYS prefer fetching this url in artifacts instead of hardcoding the values if at all possible)")
+
+async def run_query(database: str, query: str, params: dict[str, Any], stream: bool = False) -> QueryResult:
+    """Execute query on database and collect the result, shared by the read and write tools
+
+    With stream=True the rows are fetched through a server-side cursor in batches when the
+    dialect supports it, so memory stays bounded by the row limit rather than the result size.
+    """
+    # Reject pathological input before it reaches the SQL compiler
+    if len(query) > EXECUTE_QUERY_MAX_QUERY_LENGTH:
+        raise ValueError(f"Query is {len(query)} characters long, the limit is {EXECUTE_QUERY_MAX_QUERY_LENGTH}.")
+    if len(params) > EXECUTE_QUERY_MAX_PARAMS:
+        raise ValueError(f"Query has {len(params)} parameters, the limit is {EXECUTE_QUERY_MAX_PARAMS}.")
+
+    # Use a reasonable row limit to prevent memory issues
+    MAX_ROWS = 10000  # Much higher than old character limit
+
+    config = database_manager.get_database(database)
+    returns_rows = True
+    async with config.connection() as connection:
+        if stream and connection.dialect.supports_server_side_cursors:
+            if connection.dialect.name in _STREAM_IN_TRANSACTION_DIALECTS:
+                # PostgreSQL only declares server-side cursors inside a transaction, which AUTOCOMMIT never
+                # opens, so stream at the database's default isolation level instead. Session settings such as
+                # read-only were applied in autocommit mode and carry over; the pool resets the isolation level
+                # when the connection is returned.
+                await connection.commit()
+                await connection.execution_options(isolation_level=connection.default_isolation_level)
+            async with connection.stream(_compile_text(query), params, execution_options={"yield_per": EXECUTE_QUERY_YIELD_PER}) as result:
+                query_result = await QueryResult.from_async_result(database, result, max_rows=MAX_ROWS)
+        else:
+            cursor_result = await connection.execute(_compile_text(query), params)
+            returns_rows = cursor_result.returns_rows
+            if returns_rows:
+                # Create QueryResult from SQLAlchemy result
+                query_result = QueryResult.from_sqlalchemy_result(database, cursor_result, max_rows=MAX_ROWS)
+            else:
+                # For non-SELECT queries, return empty result with affected row count
+                query_result = QueryResult(
+                    database_name=database,
+                    columns=[],
+                    rows=[],
+                    database_row_count=cursor_result.rowcount,
+                    truncated=False
+                )
+
+    if _DDL_RE.match(query):
+        catalog_cache_clear(database)
+
+    if returns_rows:
+        # Save full result for Claude if configured
+        _ = save_query_result(query_result)
+
+    return query_result
+
+# Sentences shared by the read and write tool descriptions
+_LOCAL_FILES_NOTICE = "Claude Desktop may fetch the full result set via an url for analysis and artifacts."
+_PARAMS_NOTICE = "IMPORTANT: You MUST use the params parameter for query parameter substitution (e.g. 'WHERE id = :id' with params={'id': 123}) to prevent SQL injection. Direct string concatenation is a serious security risk."
+
+@functools.lru_cache(maxsize=1)
+def execute_read_query_description() -> str:
     parts = [
         f"Execute a READ-ONLY SQL query (SELECT statements only). Results will be truncated after {EXECUTE_QUERY_MAX_CHARS} characters."
     ]
     if CLAUDE_LOCAL_FILES_PATH:
-        parts.append("Claude Desktop may fetch the full result set via an url for analysis and artifacts.")
-    parts.append(
-        "IMPORTANT: You MUST use the params parameter for query parameter substitution (e.g. 'WHERE id = :id' with params={'id': 123}) to prevent SQL injection. Direct string concatenation is a serious security risk."
-    )
+        parts.append(_LOCAL_FILES_NOTICE)
+    parts.append(_PARAMS_NOTICE)
     parts.append("This tool only accepts SELECT queries. Use execute_write_query for INSERT/UPDATE/DELETE operations.")
     return " ".join(parts)
 
@@ -230,61 +452,18 @@ async def execute_read_query(
 
     database = await validate_or_elicit_database(database, ctx)
     if database is None:
-        return f"Available databases:\n{AVAILABLE_DATABASES}"
-
-    def save_query_result(result: QueryResult) -> str | None:
-        """Save complete result set for Claude if configured"""
-        if not CLAUDE_LOCAL_FILES_PATH:
-            return None
-
-        file_hash = hashlib.sha256(result.model_dump_json().encode()).hexdigest()
-        file_name = f"{file_hash}.json"
+        return AVAILABLE_DATABASES_MESSAGE
 
-        with open(os.path.join(CLAUDE_LOCAL_FILES_PATH, file_name), 'w') as f:
-            json.dump(result.model_dump(), f)
+    return await run_query(database, query, params, stream=True)
 
-        return (
-            f"Full result set url: https://cdn.jsdelivr.net/pyodide/claude-local-files/{file_name}"
-            " (format: QueryResult JSON with columns/rows structure)"
-            " (ALWAYS prefer fetching this url in artifacts instead of hardcoding the values if at all possible)")
-
-    try:
-        config = database_manager.get_database(database)
-        async with config.connection() as connection:
-            cursor_result = await connection.execute(text(query), params)
-
-            if not cursor_result.returns_rows:
-                # For non-SELECT queries, return empty result with affected row count
-                return QueryResult(
-                    database_name=database,
-                    columns=[],
-                    rows=[],
-                    database_row_count=cursor_result.rowcount,
-                    truncated=False
-                )
-
-            # Create QueryResult from SQLAlchemy result
-            # Use a reasonable row limit to prevent memory issues
-            MAX_ROWS = 10000  # Much higher than old character limit
-            query_result = QueryResult.from_sqlalchemy_result(database, cursor_result, max_rows=MAX_ROWS)
-
-            # Save full result for Claude if configured
-            _ = save_query_result(query_result)
-
-            return query_result
-    except Exception as e:
-        # For errors, return empty result (could add error field to QueryResult if needed)
-        raise e
-
-def execute_write_query_description():
+@functools.lru_cache(maxsize=1)
+def execute_write_query_description() -> str:
     parts = [
         f"Execute a SQL query that MODIFIES the database (INSERT, UPDATE, DELETE, CREATE, ALTER, DROP, etc). Results will be truncated after {EXECUTE_QUERY_MAX_CHARS} characters."
     ]
     if CLAUDE_LOCAL_FILES_PATH:
-        parts.append("Claude Desktop may fetch the full result set via an url for analysis and artifacts.")
-    parts.append(
-        "IMPORTANT: You MUST use the params parameter for query parameter substitution (e.g. 'WHERE id = :id' with params={'id': 123}) to prevent SQL injection. Direct string concatenation is a serious security risk."
-    )
+        parts.append(_LOCAL_FILES_NOTICE)
+    parts.append(_PARAMS_NOTICE)
     parts.append("WARNING: This tool can make irreversible changes to the database. Use execute_read_query for SELECT queries.")
     return " ".join(parts)
 
@@ -301,51 +480,9 @@ async def execute_write_query(
 
     database = await validate_or_elicit_database(database, ctx)
     if database is None:
-        return f"Available databases:\n{AVAILABLE_DATABASES}"
-
-    def save_query_result(result: QueryResult) -> str | None:
-        """Save complete result set for Claude if configured"""
-        if not CLAUDE_LOCAL_FILES_PATH:
-            return None
-
-        file_hash = hashlib.sha256(result.model_dump_json().encode()).hexdigest()
-        file_name = f"{file_hash}.json"
-
-        with open(os.path.join(CLAUDE_LOCAL_FILES_PATH, file_name), 'w') as f:
-            json.dump(result.model_dump(), f)
-
-        return (
-            f"Full result set url: https://cdn.jsdelivr.net/pyodide/claude-local-files/{file_name}"
-            " (format: QueryResult JSON with columns/rows structure)"
-            " (ALWAYS prefer fetching this url in artifacts instead of hardcoding the values if at all possible)")
-
-    try:
-        config = database_manager.get_database(database)
-        async with config.connection() as connection:
-            cursor_result = await connection.execute(text(query), params)
-
-            if not cursor_result.returns_rows:
-                # For non-SELECT queries, return empty result with affected row count
-                return QueryResult(
-                    database_name=database,
-                    columns=[],
-                    rows=[],
-                    database_row_count=cursor_result.rowcount,
-                    truncated=False
-                )
-
-            # Create QueryResult from SQLAlchemy result
-            # Use a reasonable row limit to prevent memory issues
-            MAX_ROWS = 10000  # Much higher than old character limit
-            query_result = QueryResult.from_sqlalchemy_result(database, cursor_result, max_rows=MAX_ROWS)
-
-            # Save full result for Claude if configured
-            _ = save_query_result(query_result)
+        return AVAILABLE_DATABASES_MESSAGE
 
-            return query_result
-    except Exception as e:
-        # For errors, return empty result (could add error field to QueryResult if needed)
-        raise e
+    return await run_query(database, query, params)
 
 def main():
     mcp.run()
@@ -0,0 +1,148 @@
+"""Tests for the catalog cache behind get_table_names and schema_definitions
+
+Run with: python -m unittest discover -s tests -p "test_*.py"
+"""
+import os
+import unittest
+from pathlib import Path
+from unittest import mock
+
+CHINOOK = Path(__file__).parent / "Chinook_Sqlite.sqlite"
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{CHINOOK}")
+
+from fastmcp import Client
+from sqlalchemy import event
+
+from mcp_alchemy import server
+from mcp_alchemy.models import DatabaseConfig, DatabaseManager
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class CatalogCacheTests(unittest.TestCase):
+    def setUp(self):
+        server._catalog_cache.clear()
+        self.addCleanup(server._catalog_cache.clear)
+        self.clock = FakeClock()
+        patcher = mock.patch.object(server.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_ttl(self):
+        server.catalog_cache_put(("table_names", "db"), ["a"])
+        self.clock.now += server.CATALOG_CACHE_TTL - 1
+        self.assertEqual(server.catalog_cache_get(("table_names", "db")), ["a"])
+        self.clock.now += 1
+        self.assertIsNone(server.catalog_cache_get(("table_names", "db")))
+
+    def test_missing_entry(self):
+        self.assertIsNone(server.catalog_cache_get(("table_names", "db")))
+
+    @mock.patch.object(server, "CATALOG_CACHE_MAX_ENTRIES", 3)
+    def test_full_cache_drops_expired_entries_first(self):
+        server.catalog_cache_put(("schema", "db", "old"), "old")
+        self.clock.now += server.CATALOG_CACHE_TTL
+        server.catalog_cache_put(("schema", "db", "a"), "a")
+        server.catalog_cache_put(("schema", "db", "b"), "b")
+        server.catalog_cache_put(("schema", "db", "c"), "c")
+        self.assertEqual(list(server._catalog_cache), [("schema", "db", k) for k in "abc"])
+
+    @mock.patch.object(server, "CATALOG_CACHE_MAX_ENTRIES", 3)
+    def test_full_cache_drops_oldest_entries(self):
+        for k in "abcd":
+            server.catalog_cache_put(("schema", "db", k), k)
+            self.clock.now += 1
+        self.assertEqual(list(server._catalog_cache), [("schema", "db", k) for k in "bcd"])
+
+    def test_clear_only_affects_one_database(self):
+        server.catalog_cache_put(("table_names", "one"), ["a"])
+        server.catalog_cache_put(("schema", "one", "a"), "a")
+        server.catalog_cache_put(("table_names", "two"), ["b"])
+        server.catalog_cache_clear("one")
+        self.assertEqual(list(server._catalog_cache), [("table_names", "two")])
+
+class CatalogToolTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        server._catalog_cache.clear()
+        self.addCleanup(server._catalog_cache.clear)
+
+        self.config = DatabaseConfig(name="chinook", url=f"sqlite+aiosqlite:///{CHINOOK}")
+        previous = server.database_manager
+        server.tests_set_global("database_manager", DatabaseManager(databases={"chinook": self.config}))
+        self.addCleanup(server.tests_set_global, "database_manager", previous)
+
+        # Count connection checkouts to see which calls reach the database
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+        def checkout(*args):
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+        def checkin(*args):
+            self.checked_out -= 1
+
+        engine = self.config.get_engine()
+        event.listen(engine.sync_engine, "checkout", checkout)
+        event.listen(engine.sync_engine, "checkin", checkin)
+        self.addCleanup(event.remove, engine.sync_engine, "checkout", checkout)
+        self.addCleanup(event.remove, engine.sync_engine, "checkin", checkin)
+
+        self.client = Client(server.mcp)
+        await self.client.__aenter__()
+
+    async def asyncTearDown(self):
+        await self.client.__aexit__(None, None, None)
+        await self.config.engine.dispose()
+
+    async def call(self, tool: str, **arguments) -> str:
+        result = await self.client.call_tool(tool, {"database": "chinook", **arguments})
+        return result.content[0].text
+
+    async def test_table_names_are_cached(self):
+        first = await self.call("get_table_names")
+        self.assertEqual(await self.call("get_table_names", q="Playlist"), "Playlist, PlaylistTrack")
+        self.assertEqual(await self.call("get_table_names"), first)
+        self.assertEqual(self.checkouts, 1)
+
+    async def test_refresh_bypasses_cache(self):
+        await self.call("get_table_names")
+        await self.call("get_table_names", refresh=True)
+        self.assertEqual(self.checkouts, 2)
+
+    async def test_schema_definitions_are_cached_per_table(self):
+        first = await self.call("schema_definitions", table_names=["Album", "Artist"])
+        checkouts = self.checkouts
+        self.assertEqual(await self.call("schema_definitions", table_names=["Album", "Artist"]), first)
+        self.assertEqual(self.checkouts, checkouts)
+
+        # Only the table not seen before is reflected
+        await self.call("schema_definitions", table_names=["Artist", "Genre"])
+        self.assertEqual(self.checkouts, checkouts + 1)
+
+    async def test_schema_reflection_uses_few_connections(self):
+        tables = (await self.call("get_table_names")).split(", ")
+        self.assertGreater(len(tables), 3)
+        with mock.patch.object(server, "SCHEMA_REFLECTION_MAX_WORKERS", 3):
+            text = await self.call("schema_definitions", table_names=tables)
+        self.assertEqual(text.count("Table: "), len(tables))
+        self.assertEqual(self.max_checked_out, 3)
+
+    async def test_unknown_table_fails_whole_call(self):
+        result = await self.client.call_tool(
+            "schema_definitions", {"database": "chinook", "table_names": ["Album", "Nope", "Track"]},
+            raise_on_error=False)
+        self.assertTrue(result.is_error)
+        self.assertIn("Nope", result.content[0].text)
+        # Sibling chunks are done or cancelled and their connections returned
+        self.assertEqual(self.checked_out, 0)
+        self.assertIsNone(server.catalog_cache_get(("schema", "chinook", "Nope")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""Tests for DatabaseConfig and DatabaseManager
+
+Run with: python -m unittest discover -s tests -p "test_*.py"
+"""
+import asyncio
+import gc
+import shutil
+import tempfile
+import unittest
+import warnings
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from mcp_alchemy import models
+from mcp_alchemy.models import DatabaseConfig, DatabaseManager, _engine_cache, _engine_cache_key
+
+class AvailableDatabasesTextTests(unittest.TestCase):
+    def setUp(self):
+        self.manager = DatabaseManager(databases={
+            "one": DatabaseConfig(name="one", url="sqlite+aiosqlite://", description="First"),
+            "two": DatabaseConfig(name="two", url="sqlite+aiosqlite://", read_only=True),
+        })
+
+    def test_lists_available_databases(self):
+        self.assertEqual(self.manager.get_available_databases_text(), "one\ntwo")
+        self.assertEqual(self.manager.get_available_databases_text_with_description(), "one (First)\ntwo (read-only)")
+
+    def test_reflects_availability_changes(self):
+        self.manager.get_available_databases_text()
+        self.manager.databases["one"].available = False
+        self.assertEqual(self.manager.get_available_databases_text(), "two")
+        self.assertEqual(self.manager.get_available_databases_text_with_description(), "two (read-only)")
+
+    def test_reflects_replaced_configs(self):
+        self.manager.get_available_databases_text_with_description()
+        self.manager.databases["two"] = DatabaseConfig(name="two", url="sqlite+aiosqlite://", description="Second")
+        self.assertEqual(self.manager.get_available_databases_text_with_description(), "one (First)\ntwo (Second)")
+
+class EngineCacheTests(unittest.TestCase):
+    def setUp(self):
+        # Engines connect lazily, the file is never created
+        self.url = f"sqlite+aiosqlite:///{tempfile.gettempdir()}/{self.id()}.sqlite"
+
+    def test_configs_for_same_database_share_engine(self):
+        one = DatabaseConfig(name="one", url=self.url)
+        two = DatabaseConfig(name="two", url=self.url)
+        self.assertIs(one.get_engine(), two.get_engine())
+
+    def test_read_only_configs_get_their_own_engine(self):
+        writable = DatabaseConfig(name="one", url=self.url)
+        read_only = DatabaseConfig(name="two", url=self.url, read_only=True)
+        self.assertIsNot(writable.get_engine(), read_only.get_engine())
+
+    def test_discarded_engine_is_dropped_by_every_config(self):
+        one = DatabaseConfig(name="one", url=self.url)
+        two = DatabaseConfig(name="two", url=self.url)
+        discarded = one.get_engine()
+        two.get_engine()
+
+        one._discard_engine()
+        self.assertIsNone(one.engine)
+        replacement = two.get_engine()
+        self.assertIsNot(replacement, discarded)
+        self.assertIs(one.get_engine(), replacement)
+
+    def test_engine_is_released_with_its_configs(self):
+        config = DatabaseConfig(name="one", url=self.url)
+        config.get_engine()
+        key = _engine_cache_key(config)
+        del config
+        gc.collect()
+        self.assertNotIn(key, _engine_cache)
+
+class DiscardEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.config = DatabaseConfig(name="one", url=f"sqlite+aiosqlite:///{tempfile.gettempdir()}/{self.id()}.sqlite")
+
+    async def create_engine(self) -> None:
+        self.config.get_engine()
+
+    def assert_no_unawaited_coroutines(self, warned: list[warnings.WarningMessage]) -> None:
+        gc.collect()
+        self.assertEqual([str(w.message) for w in warned if "never awaited" in str(w.message)], [])
+
+    def test_disposes_on_running_loop(self):
+        async def discard():
+            engine = self.config.get_engine()
+            with mock.patch.object(type(engine), "dispose", mock.AsyncMock()) as dispose:
+                self.config._discard_engine()
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+            return dispose
+
+        dispose = asyncio.run(discard())
+        dispose.assert_awaited_once_with()
+        self.assertIsNone(self.config.engine)
+
+    def test_stopped_loop_disposes_synchronously(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        loop.run_until_complete(self.create_engine())
+
+        with warnings.catch_warnings(record=True) as warned:
+            warnings.simplefilter("always")
+            with mock.patch.object(type(self.config.engine.sync_engine), "dispose") as dispose:
+                self.config._discard_engine()
+            loop.close()
+            self.assert_no_unawaited_coroutines(warned)
+        dispose.assert_called_once_with(close=False)
+
+    def test_closed_loop_disposes_synchronously(self):
+        asyncio.run(self.create_engine())
+
+        with warnings.catch_warnings(record=True) as warned:
+            warnings.simplefilter("always")
+            with mock.patch.object(type(self.config.engine.sync_engine), "dispose") as dispose:
+                self.config._discard_engine()
+            self.assert_no_unawaited_coroutines(warned)
+        dispose.assert_called_once_with(close=False)
+
+def refuse(engine: AsyncEngine):
+    raise OperationalError("connect", None, Exception("connection refused"))
+
+class ConnectRetryTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.config = DatabaseConfig(name="one", url=f"sqlite+aiosqlite:///{tmp_dir}/one.sqlite")
+
+        # Sleeping only advances a fake clock
+        self.now = 1000.0
+        self.delays: list[float] = []
+
+        async def sleep(delay):
+            self.delays.append(delay)
+            self.now += delay
+
+        # Jitter is always at its upper bound unless a test says otherwise
+        self.random = SimpleNamespace(uniform=mock.Mock(side_effect=lambda a, b: b))
+        for patcher in (mock.patch.object(models.asyncio, "sleep", sleep),
+                        mock.patch.object(models, "time", SimpleNamespace(monotonic=lambda: self.now)),
+                        mock.patch.object(models, "random", self.random),
+                        mock.patch.object(models.logger, "disabled", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        if self.config.engine is not None:
+            await self.config.engine.dispose()
+
+    def fail_connects(self, failures: int | None) -> mock.MagicMock:
+        """Make the first failures connects raise, or every connect when failures is None"""
+        connect = AsyncEngine.connect
+        attempts = []
+
+        def fake_connect(engine):
+            attempts.append(engine)
+            if failures is None or len(attempts) <= failures:
+                refuse(engine)
+            return connect(engine)
+
+        patcher = mock.patch.object(AsyncEngine, "connect", autospec=True, side_effect=fake_connect)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    async def test_connects_after_transient_failures(self):
+        connect = self.fail_connects(2)
+        async with self.config.connection() as conn:
+            self.assertEqual((await conn.exec_driver_sql("SELECT 1")).scalar(), 1)
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual(len(self.delays), 2)
+        self.assertLess(self.delays[0], self.delays[1])
+
+    async def test_gives_up_after_max_retries(self):
+        connect = self.fail_connects(None)
+        with self.assertRaises(OperationalError):
+            await self.config._connect_with_retry()
+        self.assertEqual(connect.call_count, models.DB_CONNECT_MAX_RETRIES)
+        self.assertEqual(len(self.delays), models.DB_CONNECT_MAX_RETRIES - 1)
+
+    async def test_other_errors_are_not_retried(self):
+        connect = self.fail_connects(None)
+        connect.side_effect = ProgrammingError("connect", None, Exception("bad"))
+        with self.assertRaises(ProgrammingError):
+            await self.config._connect_with_retry()
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(self.delays, [])
+
+    @mock.patch.object(models, "DB_CONNECT_MAX_RETRIES", 10)
+    @mock.patch.object(models, "DB_CONNECT_DEADLINE", 1000.0)
+    async def test_delays_are_capped_with_jitter(self):
+        self.fail_connects(None)
+        with self.assertRaises(OperationalError):
+            await self.config._connect_with_retry()
+        self.assertEqual(len(self.delays), 9)
+        cap = models.DB_CONNECT_MAX_DELAY * (1 + models.DB_CONNECT_JITTER)
+        self.assertEqual(self.delays[-1], cap)
+        self.assertTrue(all(delay <= cap for delay in self.delays))
+        self.assertEqual(self.delays, sorted(self.delays))
+
+    async def test_jitter_is_random(self):
+        self.fail_connects(1)
+        self.random.uniform.side_effect = None
+        self.random.uniform.return_value = 0.0
+        await (await self.config._connect_with_retry()).close()
+        self.random.uniform.assert_called_once_with(0, models.DB_CONNECT_JITTER)
+        # No jitter leaves the plain exponential delay
+        self.assertEqual(self.delays, [models.DB_CONNECT_BASE_DELAY * 1.5])
+
+    @mock.patch.object(models, "DB_CONNECT_MAX_RETRIES", 10)
+    @mock.patch.object(models, "DB_CONNECT_DEADLINE", 5.0)
+    async def test_deadline_stops_retries(self):
+        connect = self.fail_connects(None)
+        start = self.now
+        with self.assertRaises(OperationalError):
+            await self.config._connect_with_retry()
+        self.assertLess(connect.call_count, 10)
+        self.assertLessEqual(self.now - start, models.DB_CONNECT_DEADLINE)
+
+    async def test_backoff_grows_while_failing_and_shrinks_on_success(self):
+        connect = self.fail_connects(2)
+        await (await self.config._connect_with_retry()).close()
+        self.assertEqual(self.config._backoff_mult, 1.5 ** 2 / 1.25)
+
+        # The learned multiplier carries over to the next failure
+        self.delays.clear()
+        connect.side_effect = refuse
+        with self.assertRaises(OperationalError):
+            await self.config._connect_with_retry()
+        self.assertGreater(self.delays[0], models.DB_CONNECT_BASE_DELAY * 1.5 * (1 + models.DB_CONNECT_JITTER))
+
+if __name__ == "__main__":
+    unittest.main()
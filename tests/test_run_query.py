@@ -0,0 +1,192 @@
+"""Tests for run_query, the shared execution path of the read and write tools
+
+Run with: python -m unittest discover -s tests -p "test_*.py"
+
+Set TEST_POSTGRES_URL (e.g. postgresql+asyncpg://postgres@localhost/postgres) to also run the
+PostgreSQL tests.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+CHINOOK = Path(__file__).parent / "Chinook_Sqlite.sqlite"
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{CHINOOK}")
+
+from sqlalchemy import event
+
+from mcp_alchemy import server
+from mcp_alchemy.models import DatabaseConfig, DatabaseManager
+
+# Produces more rows than run_query's row limit of 10000
+MANY_ROWS_QUERY = """
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 12345)
+SELECT i FROM n
+"""
+
+class RunQueryTestCase(unittest.IsolatedAsyncioTestCase):
+    url: str | None = None
+    read_only = False
+
+    async def asyncSetUp(self):
+        url = self.url
+        if url is None:
+            tmp_dir = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, tmp_dir)
+            db_path = os.path.join(tmp_dir, "chinook.sqlite")
+            shutil.copy(CHINOOK, db_path)
+            url = f"sqlite+aiosqlite:///{db_path}"
+
+        self.config = DatabaseConfig(name="test", url=url, read_only=self.read_only)
+        manager = DatabaseManager(databases={"test": self.config})
+        previous = server.database_manager
+        server.tests_set_global("database_manager", manager)
+        self.addCleanup(server.tests_set_global, "database_manager", previous)
+
+    async def asyncTearDown(self):
+        if self.config.engine is not None:
+            await self.config.engine.dispose()
+
+    def record_autocommit(self) -> list[tuple[str, bool]]:
+        """Record (statement, DBAPI connection in autocommit) for every statement SQLite executes"""
+        executed = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # pysqlite signals autocommit with isolation_level None
+            executed.append((statement, conn.connection.dbapi_connection.isolation_level is None))
+
+        sync_engine = self.config.get_engine().sync_engine
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        self.addCleanup(event.remove, sync_engine, "before_cursor_execute", before_cursor_execute)
+        return executed
+
+class StreamTests(RunQueryTestCase):
+    async def test_stream_opens_transaction_where_cursors_need_one(self):
+        # Pretend SQLite is like PostgreSQL, whose server-side cursors fail under AUTOCOMMIT
+        executed = self.record_autocommit()
+        with mock.patch.object(server, "_STREAM_IN_TRANSACTION_DIALECTS", frozenset({"sqlite"})):
+            result = await server.run_query("test", "SELECT Name FROM Genre ORDER BY GenreId", {}, stream=True)
+
+        self.assertEqual(result.rows[0], ["Rock"])
+        self.assertEqual(executed, [("SELECT Name FROM Genre ORDER BY GenreId", False)])
+
+    async def test_connection_returns_to_autocommit_after_stream(self):
+        executed = self.record_autocommit()
+        with mock.patch.object(server, "_STREAM_IN_TRANSACTION_DIALECTS", frozenset({"sqlite"})):
+            await server.run_query("test", "SELECT 1", {}, stream=True)
+        await server.run_query("test", "INSERT INTO Genre (GenreId, Name) VALUES (100, 'Test')", {})
+
+        self.assertEqual(executed[-1][1], True)
+        self.assertEqual(self.config.get_engine().pool.checkedin(), 1)
+
+    async def test_stream_stays_in_autocommit_elsewhere(self):
+        executed = self.record_autocommit()
+        await server.run_query("test", "SELECT 1", {}, stream=True)
+
+        self.assertEqual(executed, [("SELECT 1", True)])
+
+    async def test_truncation_counts_all_rows(self):
+        for stream in (True, False):
+            with self.subTest(stream=stream):
+                result = await server.run_query("test", MANY_ROWS_QUERY, {}, stream=stream)
+                self.assertTrue(result.truncated)
+                self.assertEqual(len(result.rows), 10000)
+                self.assertEqual(result.rows[-1], [10000])
+                self.assertEqual(result.database_row_count, 12345)
+
+    async def test_small_result_is_not_truncated(self):
+        for stream in (True, False):
+            with self.subTest(stream=stream):
+                result = await server.run_query("test", "SELECT GenreId FROM Genre", {}, stream=stream)
+                self.assertFalse(result.truncated)
+                self.assertEqual(result.database_row_count, 25)
+                self.assertEqual(len(result.rows), 25)
+
+class CatalogInvalidationTests(RunQueryTestCase):
+    def setUp(self):
+        server._catalog_cache.clear()
+        self.addCleanup(server._catalog_cache.clear)
+
+    async def test_ddl_clears_catalog_cache(self):
+        server.catalog_cache_put(("table_names", "test"), ["Album"])
+        await server.run_query("test", "  create table Extra (a int)", {})
+        self.assertIsNone(server.catalog_cache_get(("table_names", "test")))
+
+    async def test_ddl_after_comments_clears_catalog_cache(self):
+        for query in ("-- add a table\nCREATE TABLE Extra (a int)", "/* cleanup */ DROP TABLE Extra",
+                      "/* multi\nline */\n-- and more\n  create table Extra (a int)"):
+            with self.subTest(query=query):
+                server.catalog_cache_put(("table_names", "test"), ["Album"])
+                await server.run_query("test", query, {})
+                self.assertIsNone(server.catalog_cache_get(("table_names", "test")))
+
+    async def test_other_statements_keep_catalog_cache(self):
+        server.catalog_cache_put(("table_names", "test"), ["Album"])
+        await server.run_query("test", "SELECT 1", {}, stream=True)
+        await server.run_query("test", "DELETE FROM Genre WHERE GenreId = 100", {})
+        # DDL keywords inside comments don't count
+        await server.run_query("test", "-- DROP TABLE Genre\nSELECT 1", {}, stream=True)
+        await server.run_query("test", "/* CREATE */ SELECT 1", {}, stream=True)
+        self.assertEqual(server.catalog_cache_get(("table_names", "test")), ["Album"])
+
+class LimitTests(RunQueryTestCase):
+    async def test_rejects_long_query(self):
+        query = "SELECT 1" + " " * server.EXECUTE_QUERY_MAX_QUERY_LENGTH
+        with self.assertRaisesRegex(ValueError, "characters long"):
+            await server.run_query("test", query, {})
+
+    async def test_rejects_too_many_params(self):
+        params = {f"p{i}": i for i in range(server.EXECUTE_QUERY_MAX_PARAMS + 1)}
+        with self.assertRaisesRegex(ValueError, "parameters"):
+            await server.run_query("test", "SELECT :p0", params)
+
+    async def test_accepts_query_at_limits(self):
+        params = {f"p{i}": i for i in range(server.EXECUTE_QUERY_MAX_PARAMS)}
+        query = "SELECT :p0"
+        query += " " * (server.EXECUTE_QUERY_MAX_QUERY_LENGTH - len(query))
+        result = await server.run_query("test", query, params)
+        self.assertEqual(result.rows, [[0]])
+
+class TextCacheTests(unittest.TestCase):
+    def test_short_queries_are_cached(self):
+        self.assertIs(server._compile_text("SELECT 1"), server._compile_text("SELECT 1"))
+
+    def test_long_queries_bypass_cache(self):
+        query = "SELECT 1" + " " * server._TEXT_CACHE_MAX_QUERY_CHARS
+        self.assertLess(len(query), server.EXECUTE_QUERY_MAX_QUERY_LENGTH)
+        self.assertIsNot(server._compile_text(query), server._compile_text(query))
+
+@unittest.skipUnless(os.environ.get("TEST_POSTGRES_URL"), "TEST_POSTGRES_URL not set")
+class PostgreSQLStreamTests(RunQueryTestCase):
+    url = os.environ.get("TEST_POSTGRES_URL")
+
+    async def test_stream_select(self):
+        result = await server.run_query("test", "SELECT g FROM generate_series(1, 12345) g", {}, stream=True)
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.database_row_count, 12345)
+
+    async def test_writes_persist_after_stream(self):
+        await server.run_query("test", "SELECT 1", {}, stream=True)
+        await server.run_query("test", "CREATE TABLE mcp_alchemy_stream_test (a int)", {})
+        try:
+            await server.run_query("test", "INSERT INTO mcp_alchemy_stream_test VALUES (1)", {})
+            # A fresh engine sees the row only if the insert was committed
+            await self.config.engine.dispose()
+            result = await server.run_query("test", "SELECT count(*) FROM mcp_alchemy_stream_test", {}, stream=True)
+            self.assertEqual(result.rows, [[1]])
+        finally:
+            await server.run_query("test", "DROP TABLE mcp_alchemy_stream_test", {})
+
+@unittest.skipUnless(os.environ.get("TEST_POSTGRES_URL"), "TEST_POSTGRES_URL not set")
+class PostgreSQLReadOnlyStreamTests(RunQueryTestCase):
+    url = os.environ.get("TEST_POSTGRES_URL")
+    read_only = True
+
+    async def test_stream_transaction_is_read_only(self):
+        result = await server.run_query("test", "SELECT current_setting('transaction_read_only')", {}, stream=True)
+        self.assertEqual(result.rows, [["on"]])
+
+if __name__ == "__main__":
+    unittest.main()
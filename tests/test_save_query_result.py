@@ -0,0 +1,85 @@
+"""Tests for saving full result sets to CLAUDE_LOCAL_FILES_PATH
+
+Run with: python -m unittest discover -s tests -p "test_*.py"
+"""
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+CHINOOK = Path(__file__).parent / "Chinook_Sqlite.sqlite"
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{CHINOOK}")
+
+from mcp_alchemy import server
+from mcp_alchemy.models import QueryResult
+
+def make_result(rows: list[list]) -> QueryResult:
+    return QueryResult(database_name="test", columns=["id", "at", "price"], rows=rows,
+                       database_row_count=len(rows), truncated=False)
+
+class SaveQueryResultTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        patcher = mock.patch.object(server, "CLAUDE_LOCAL_FILES_PATH", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.result = make_result([[i, datetime.datetime(2024, 1, 1, 12, i), decimal.Decimal("1.50")] for i in range(50)])
+
+    def saved_files(self) -> list[str]:
+        return sorted(os.listdir(self.dir))
+
+    def test_disabled_without_path(self):
+        with mock.patch.object(server, "CLAUDE_LOCAL_FILES_PATH", None):
+            self.assertIsNone(server.save_query_result(self.result))
+
+    def test_file_is_named_by_content_hash(self):
+        message = server.save_query_result(self.result)
+        [file_name] = self.saved_files()
+        self.assertIn(file_name, message)
+
+        with open(os.path.join(self.dir, file_name), 'rb') as f:
+            content = f.read()
+        self.assertEqual(file_name, f"{hashlib.sha256(content).hexdigest()}.json")
+        self.assertEqual(json.loads(content), json.loads(self.result.model_dump_json()))
+        self.assertEqual(os.stat(os.path.join(self.dir, file_name)).st_mode & 0o777, 0o644)
+
+    def test_same_result_is_saved_once(self):
+        server.save_query_result(self.result)
+        [file_name] = self.saved_files()
+        path = os.path.join(self.dir, file_name)
+        inode = os.stat(path).st_ino
+
+        with mock.patch.object(server.tempfile, "mkstemp") as mkstemp:
+            message = server.save_query_result(make_result(list(self.result.rows)))
+        # The content hash already names an existing file, nothing is written
+        mkstemp.assert_not_called()
+        self.assertIn(file_name, message)
+        self.assertEqual(self.saved_files(), [file_name])
+        self.assertEqual(os.stat(path).st_ino, inode)
+
+    def test_different_results_get_different_files(self):
+        server.save_query_result(self.result)
+        server.save_query_result(make_result(self.result.rows[:10]))
+        self.assertEqual(len(self.saved_files()), 2)
+
+    def test_failed_write_leaves_no_files(self):
+        with mock.patch.object(server.os, "fdopen", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                server.save_query_result(self.result)
+        self.assertEqual(self.saved_files(), [])
+
+    def test_failed_serialization_leaves_no_files(self):
+        with mock.patch.object(server, "to_json", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                server.save_query_result(self.result)
+        self.assertEqual(self.saved_files(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tests for the Azure token cache
+
+Run with: python -m unittest discover -s tests -p "test_*.py"
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from auth import tokens
+from auth.tokens import AzureTokenCache
+
+class FakeThread:
+    """Records background refreshes instead of starting threads, tests run them with run_pending()"""
+    started: list["FakeThread"] = []
+
+    def __init__(self, target, daemon):
+        self.target = target
+
+    def start(self):
+        FakeThread.started.append(self)
+
+class AzureTokenCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        FakeThread.started = []
+        for patcher in (mock.patch.object(tokens, "time", SimpleNamespace(monotonic=lambda: self.now)),
+                        mock.patch.object(tokens, "Thread", FakeThread),
+                        mock.patch.object(tokens.logger, "disabled", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.cache = AzureTokenCache()
+        self.tokens = iter(f"token-{i}" for i in range(1, 100))
+        self.cache._fetch = mock.Mock(side_effect=lambda: (next(self.tokens), self.now + tokens.TOKEN_LIFETIME))
+
+    def run_pending(self):
+        started, FakeThread.started = FakeThread.started, []
+        for thread in started:
+            thread.target()
+
+    def advance_to_remaining(self, remaining: float):
+        """Move the clock so the cached token has remaining seconds left"""
+        self.now = self.cache._cached[1] - remaining
+
+    def test_first_call_fetches(self):
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(self.cache._fetch.call_count, 1)
+
+    def test_fresh_token_is_served_from_cache(self):
+        self.cache.get_token()
+        self.advance_to_remaining(tokens.SOFT_REFRESH_WINDOW + 1)
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(self.cache._fetch.call_count, 1)
+        self.assertEqual(FakeThread.started, [])
+
+    def test_soft_window_refreshes_once_in_background(self):
+        self.cache.get_token()
+        self.advance_to_remaining(tokens.SOFT_REFRESH_WINDOW - 1)
+        # The old token is still handed out while a single refresh runs
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(len(FakeThread.started), 1)
+
+        self.run_pending()
+        self.assertEqual(self.cache.get_token(), "token-2")
+        self.assertEqual(self.cache._fetch.call_count, 2)
+
+    def test_failed_background_refresh_backs_off(self):
+        self.cache.get_token()
+        self.cache._fetch.side_effect = RuntimeError("az login expired")
+        self.advance_to_remaining(tokens.SOFT_REFRESH_WINDOW - 1)
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.run_pending()
+        self.assertEqual(self.cache._fetch.call_count, 2)
+
+        # No new attempt until the retry interval has passed
+        self.now += tokens.REFRESH_RETRY_INTERVAL - 1
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(FakeThread.started, [])
+
+        self.now += 1
+        self.assertEqual(self.cache.get_token(), "token-1")
+        self.assertEqual(len(FakeThread.started), 1)
+
+    def test_failed_background_refresh_is_logged(self):
+        self.cache.get_token()
+        self.cache._fetch.side_effect = RuntimeError("az login expired")
+        self.advance_to_remaining(tokens.SOFT_REFRESH_WINDOW - 1)
+        self.cache.get_token()
+        with mock.patch.object(tokens.logger, "disabled", False), self.assertLogs(tokens.logger, "WARNING") as logs:
+            self.run_pending()
+        self.assertIn("az login expired", logs.output[0])
+
+    def test_hard_window_blocks_on_fetch(self):
+        self.cache.get_token()
+        self.advance_to_remaining(tokens.HARD_BLOCK_WINDOW)
+        self.assertEqual(self.cache.get_token(), "token-2")
+        self.assertEqual(FakeThread.started, [])
+
+    def test_hard_window_ignores_refresh_backoff(self):
+        self.cache.get_token()
+        self.cache._fetch.side_effect = RuntimeError("az login expired")
+        self.advance_to_remaining(tokens.SOFT_REFRESH_WINDOW - 1)
+        self.cache.get_token()
+        self.run_pending()
+
+        self.cache._fetch.side_effect = lambda: ("token-2", self.now + tokens.TOKEN_LIFETIME)
+        self.advance_to_remaining(tokens.HARD_BLOCK_WINDOW)
+        self.assertEqual(self.cache.get_token(), "token-2")
+
+if __name__ == "__main__":
+    unittest.main()